@@ -5,43 +5,101 @@ RDG Stuttgart Song Wish Processor
 Validates song wish requests and generates output Excel with messages and songlist.
 """
 
+import functools
+import json
 import re
+import sqlite3
+import threading
+import time
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from itertools import islice
 from urllib.parse import urlparse, parse_qs, urlencode, quote
 import pandas as pd
 import yt_dlp
 from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
 from openpyxl.utils.dataframe import dataframe_to_rows
 
 # Configuration
 FORM_URL = "https://forms.gle/KTg2MvaRo8TFVK7q7"  # Replace with actual form URL
 MAX_SONG_DURATION_SECONDS = 90
 FIRST_GUARANTEED_COUNT = 50
+YOUTUBE_FETCH_WORKERS = 16  # Parallel yt-dlp requests
+FAIL_FAST_VALIDATION = False  # Skip the YouTube fetch for songs that already fail a local check
+
+YDL_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'extract_flat': False,
+    'skip_download': True,
+    'socket_timeout': 30,  # 30 second timeout for network operations
+    'source_address': '0.0.0.0',  # Force IPv4 to avoid YouTube connection issues
+}
 
 # Blocked songs list file
 BLOCKED_SONGS_FILE = "blocked_songs.xlsx"
 
+# Persistent YouTube metadata cache (set YOUTUBE_CACHE_FILE to None to disable)
+YOUTUBE_CACHE_FILE = "youtube_cache.sqlite3"
+YOUTUBE_CACHE_TTL_DAYS = 30
+YOUTUBE_CACHE_FIELDS = ['title', 'description', 'duration', 'age_limit', 'tags']  # = keys returned by get_youtube_info
+
+_YOUTUBE_ID_RE = re.compile(
+    r'^(?:https?://)?(?:(?:www|m|music)\.)?'
+    r'(?:youtube\.com/(?:watch\?(?:[^#]*&)?v=|shorts/|embed/|live/)|youtu\.be/)'
+    r'([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])',
+    re.IGNORECASE,
+)
+# Every ASCII byte except a-z and 0-9, for bytes.translate deletion
+_NON_ALNUM_BYTES = bytes(c for c in range(256) if not (ord('a') <= c <= ord('z') or ord('0') <= c <= ord('9')))
+_YOUTUBE_URL_RE = re.compile(r'^(?:https?://)?(?:(?:www|m|music)\.)?(?:youtube\.com|youtu\.be)/', re.IGNORECASE)
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+_PHONE_CLEAN_RE = re.compile(r'[^\d+]')
+
 
 def normalize_text(text):
     """Normalize text by removing special chars, spaces, and converting to lowercase."""
     if pd.isna(text) or text is None:
         return ""
-    text = str(text).lower()
-    # Remove accents
-    text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
-    # Remove all non-alphanumeric characters
-    text = re.sub(r'[^a-z0-9]', '', text)
-    return text
+    return _normalize_lower(str(text).lower())
+
+
+def _normalize_lower(text):
+    """normalize_text() for a string that is already lowercase."""
+    # Remove accents, then all non-alphanumeric characters
+    text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore')
+    return text.translate(None, _NON_ALNUM_BYTES).decode('ASCII')
+
+
+def normalize_series(series):
+    """Vectorized normalize_text for a whole pandas Series of strings."""
+    text = series.where(series.notna(), '').astype(str).str.lower()
+    text = text.str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+    return text.str.replace(_NON_ALNUM_RE, '', regex=True)
 
 
 def clean_youtube_url(url):
-    """Remove playlist parameters from YouTube URL."""
+    """Remove playlist parameters from YouTube URL.
+
+    Recognized video URLs (watch, youtu.be, shorts, embed, live) are rewritten to
+    the canonical https://www.youtube.com/watch?v=ID form.
+    """
     if pd.isna(url) or not url:
         return None
-    url = str(url).strip()
+    return _clean_youtube_url(str(url).strip())
 
-    # Parse the URL
+
+@functools.lru_cache(maxsize=4096)
+def _clean_youtube_url(url):
+    match = _YOUTUBE_ID_RE.match(url)
+    if match:
+        return f"https://www.youtube.com/watch?v={match.group(1)}"
+
+    # Anything else: parse the URL
     parsed = urlparse(url)
     query_params = parse_qs(parsed.query)
 
@@ -64,9 +122,11 @@ def parse_timestamp(ts):
     """Parse timestamp string to seconds. Handles MM:SS:00 and MM:SS formats."""
     if pd.isna(ts) or not ts:
         return 0
+    return _parse_timestamp(str(ts).strip())
 
-    ts_str = str(ts).strip()
 
+@functools.lru_cache(maxsize=4096)
+def _parse_timestamp(ts_str):
     # Handle time format from Excel (HH:MM:SS or MM:SS:00)
     parts = ts_str.split(':')
 
@@ -90,88 +150,210 @@ def parse_timestamp(ts):
         return 0
 
 
-def get_youtube_info(url):
-    """Fetch YouTube video information using yt-dlp."""
+def is_youtube_url(url):
+    """Check if the URL points to youtube.com or youtu.be."""
+    return bool(url) and _YOUTUBE_URL_RE.match(str(url)) is not None
+
+
+def get_youtube_video_id(url):
+    """Extract the video ID from a YouTube URL, or None if it has none."""
     if not url:
         return None
+    match = _YOUTUBE_ID_RE.match(str(url).strip())
+    return match.group(1) if match else None
+
+
+def _read_youtube_cache(video_id):
+    conn = sqlite3.connect(YOUTUBE_CACHE_FILE, timeout=30)
+    try:
+        conn.execute('CREATE TABLE IF NOT EXISTS info (id TEXT PRIMARY KEY, json BLOB, fetched_at REAL)')
+        row = conn.execute('SELECT json, fetched_at FROM info WHERE id = ?', (video_id,)).fetchone()
+    finally:
+        conn.close()
+    if row and time.time() - row[1] < YOUTUBE_CACHE_TTL_DAYS * 86400:
+        info = json.loads(row[0])
+        if isinstance(info, dict):
+            return info
+    return None
 
-    ydl_opts = {
-        'quiet': True,
-        'no_warnings': True,
-        'extract_flat': False,
-        'skip_download': True,
-        'socket_timeout': 30,  # 30 second timeout for network operations
-        'source_address': '0.0.0.0',  # Force IPv4 to avoid YouTube connection issues
-    }
 
+def _write_youtube_cache(video_id, info):
+    cached = {field: info.get(field) for field in YOUTUBE_CACHE_FIELDS}
+    conn = sqlite3.connect(YOUTUBE_CACHE_FILE, timeout=30)
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO info (id, json, fetched_at) VALUES (?, ?, ?)',
+                         (video_id, json.dumps(cached), time.time()))
+    finally:
+        conn.close()
+
+
+def cached_youtube_info(fetch):
+    """Cache successful video info lookups in a sqlite database keyed by video ID.
+
+    Entries older than YOUTUBE_CACHE_TTL_DAYS are fetched again. Errors are never
+    cached. A broken cache file or a malformed entry (bad JSON, missing
+    timestamp) counts as a cache miss.
+    """
+    @functools.wraps(fetch)
+    def wrapper(url, ydl=None):
+        video_id = get_youtube_video_id(url)
+        if not YOUTUBE_CACHE_FILE or not video_id:
+            return fetch(url, ydl)
+
+        try:
+            cached = _read_youtube_cache(video_id)
+            if cached is not None:
+                return cached
+        except (sqlite3.Error, ValueError, TypeError):
+            pass
+
+        info = fetch(url, ydl)
+        if info and 'error' not in info:
+            try:
+                _write_youtube_cache(video_id, info)
+            except sqlite3.Error:
+                pass
+        return info
+
+    return wrapper
+
+
+@cached_youtube_info
+def get_youtube_info(url, ydl=None):
+    """Fetch YouTube video information using yt-dlp.
+
+    An existing YoutubeDL instance can be passed in to reuse its connections.
+    """
+    if not url:
+        return None
+
+    try:
+        if ydl is None:
+            with yt_dlp.YoutubeDL(YDL_OPTS) as own_ydl:
+                info = own_ydl.extract_info(url, download=False)
+        else:
             info = ydl.extract_info(url, download=False)
-            return {
-                'title': info.get('title', ''),
-                'description': info.get('description', ''),
-                'duration': info.get('duration', 0),
-                'age_limit': info.get('age_limit', 0),
-                'categories': info.get('categories', []),
-                'tags': info.get('tags', []),
-                'channel': info.get('channel', ''),
-                'uploader': info.get('uploader', ''),
-            }
+        # Keep these keys in sync with YOUTUBE_CACHE_FIELDS, so cached and
+        # freshly fetched info have the same shape
+        return {
+            'title': info.get('title', ''),
+            'description': info.get('description', ''),
+            'duration': info.get('duration', 0),
+            'age_limit': info.get('age_limit', 0),
+            'tags': info.get('tags', []),
+        }
     except Exception as e:
         return {'error': str(e)}
 
 
-def check_is_lyric_video(video_info):
-    """Check if the video appears to be a lyric video."""
-    if not video_info or 'error' in video_info:
-        return False, "Video konnte nicht abgerufen werden / Could not fetch video"
+def fetch_youtube_infos(urls, max_workers=YOUTUBE_FETCH_WORKERS):
+    """Fetch video information for many URLs in parallel.
 
-    title = (video_info.get('title') or '').lower()
-    description = (video_info.get('description') or '').lower()
-    tags = [t.lower() for t in video_info.get('tags', [])] if video_info.get('tags') else []
+    YoutubeDL is not thread-safe, so each worker thread keeps its own instance
+    and reuses it for all URLs it handles.
 
-    # Positive indicators for lyric video
-    lyric_indicators = ['lyric', 'lyrics', 'lyric video', 'lyrics video', 'letra', 'text', 'sing-along', 'singalong']
+    Each distinct URL is fetched only once, however often it appears in urls.
 
-    # Negative indicators (official MV, dance practice, etc.)
-    negative_indicators = ['official mv', 'official music video', 'dance practice',
-                          'dance practice video', 'choreography video', 'performance video',
-                          'm/v', '(mv)', '[mv]']
+    Returns:
+        dict: cleaned URL -> video info (as returned by get_youtube_info)
+    """
+    urls = list(dict.fromkeys(url for url in urls if url))
+    if not urls:
+        return {}
 
-    title_lower = title.lower()
+    local = threading.local()
+    instances = []
+    instances_lock = threading.Lock()
+
+    def fetch(url):
+        ydl = getattr(local, 'ydl', None)
+        if ydl is None:
+            ydl = local.ydl = yt_dlp.YoutubeDL(YDL_OPTS)
+            with instances_lock:
+                instances.append(ydl)
+        return get_youtube_info(url, ydl)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(urls, executor.map(fetch, urls)))
+    finally:
+        for ydl in instances:
+            ydl.close()
+
+
+# Positive indicators for lyric video
+LYRIC_INDICATORS = ['lyric', 'lyrics', 'lyric video', 'lyrics video', 'letra', 'text', 'sing-along', 'singalong']
+
+# Negative indicators (official MV, dance practice, etc.)
+NEGATIVE_INDICATORS = ['official mv', 'official music video', 'dance practice',
+                       'dance practice video', 'choreography video', 'performance video',
+                       'm/v', '(mv)', '[mv]']
+
+# One regex per indicator list, so each text is scanned once instead of once per indicator
+_LYRIC_INDICATOR_RE = re.compile('|'.join(map(re.escape, LYRIC_INDICATORS)))
+_NEGATIVE_INDICATOR_RE = re.compile('|'.join(map(re.escape, NEGATIVE_INDICATORS)))
+_LYRIC_INDICATOR_SET = frozenset(LYRIC_INDICATORS)
+
+
+def lowercase_video_texts(video_info):
+    """Return (title, description, tags) of the video, all lowercased."""
+    if not video_info:
+        return '', '', []
+    title = str(video_info.get('title') or '').lower()
+    description = str(video_info.get('description') or '').lower()
+    tags = [t.lower() for t in video_info['tags']] if video_info.get('tags') else []
+    return title, description, tags
+
+
+def check_is_lyric_video(video_info, lowered_texts=None):
+    """Check if the video appears to be a lyric video.
+
+    lowered_texts can be the precomputed result of lowercase_video_texts().
+    """
+    if not video_info or 'error' in video_info:
+        return False, "Video konnte nicht abgerufen werden / Could not fetch video"
+
+    title, description, tags = lowered_texts or lowercase_video_texts(video_info)
 
     # Check for negative indicators first
-    for neg in negative_indicators:
-        if neg in title_lower:
-            return False, f"Kein Lyric Video ('{neg}' im Titel gefunden) / Not a lyric video ('{neg}' found in title)"
+    if _NEGATIVE_INDICATOR_RE.search(title):
+        # Report the first indicator in list order, as before
+        neg = next(neg for neg in NEGATIVE_INDICATORS if neg in title)
+        return False, f"Kein Lyric Video ('{neg}' im Titel gefunden) / Not a lyric video ('{neg}' found in title)"
 
     # Check for positive indicators
-    for pos in lyric_indicators:
-        if pos in title_lower or pos in description or pos in tags:
-            return True, None
+    if (_LYRIC_INDICATOR_RE.search(title) or _LYRIC_INDICATOR_RE.search(description)
+            or not _LYRIC_INDICATOR_SET.isdisjoint(tags)):
+        return True, None
 
     # If no clear indicator, we'll accept it but note it's uncertain
     return True, None  # Accept by default, but could be flagged for manual review
 
 
-def check_artist_title_match(video_info, artist, song_title):
-    """Check if artist and title are present in YouTube video title."""
+def check_artist_title_match(video_info, artist, song_title, artist_norm=None, title_norm=None,
+                             yt_title_norm=None):
+    """Check if artist and title are present in YouTube video title.
+
+    Already normalized artist/title/YouTube title can be passed to skip
+    normalizing them again.
+    """
     if not video_info or 'error' in video_info:
         return False, "Video konnte nicht abgerufen werden / Could not fetch video"
 
-    yt_title = video_info.get('title', '')
-    yt_title_normalized = normalize_text(yt_title)
+    if yt_title_norm is None:
+        yt_title_norm = normalize_text(video_info.get('title', ''))
 
     errors = []
 
     # Check artist
-    artist_normalized = normalize_text(artist)
-    if artist_normalized and artist_normalized not in yt_title_normalized:
+    artist_normalized = normalize_text(artist) if artist_norm is None else artist_norm
+    if artist_normalized and artist_normalized not in yt_title_norm:
         errors.append(f"Künstler '{artist}' nicht im YouTube-Titel gefunden / Artist '{artist}' not found in YouTube title")
 
     # Check song title
-    title_normalized = normalize_text(song_title)
-    if title_normalized and title_normalized not in yt_title_normalized:
+    title_normalized = normalize_text(song_title) if title_norm is None else title_norm
+    if title_normalized and title_normalized not in yt_title_norm:
         errors.append(f"Songtitel '{song_title}' nicht im YouTube-Titel gefunden / Song title '{song_title}' not found in YouTube title")
 
     if errors:
@@ -207,61 +389,97 @@ def check_age_restriction(video_info):
     return True, None
 
 
+def _column(df, name):
+    """Return column `name` of df, or a column of empty strings if it is missing."""
+    if name in df:
+        return df[name]
+    return pd.Series('', index=df.index, dtype=object)
+
+
 def load_blocked_songs():
-    """Load blocked songs list from Excel file."""
+    """Load blocked songs list from Excel file.
+
+    Returns:
+        frozenset: (normalized artist, normalized title) pairs
+    """
     try:
         df = pd.read_excel(BLOCKED_SONGS_FILE)
-        blocked = {}
-        for _, row in df.iterrows():
-            artist = normalize_text(row.get('Artist', ''))
-            title = normalize_text(row.get('Title', ''))
-            grund = row.get('Grund', '')
-            if artist and title:
-                blocked[(artist, title)] = grund if pd.notna(grund) else ''
-        return blocked
+        artists = _column(df, 'Artist').pipe(normalize_series)
+        titles = _column(df, 'Title').pipe(normalize_series)
+        return frozenset((artist, title) for artist, title in zip(artists, titles) if artist and title)
     except FileNotFoundError:
-        return {}
-
+        return frozenset()
 
-def check_blocked_song(artist, title, blocked_songs):
-    """Check if the song is in the blocked list."""
-    artist_norm = normalize_text(artist)
-    title_norm = normalize_text(title)
 
+def check_blocked_song(artist_norm, title_norm, blocked_songs):
+    """Check if the song is in the blocked list (expects normalized artist and title)."""
     if (artist_norm, title_norm) in blocked_songs:
         return False, f"Das Lied befindet sich auf der Liste der gesperrten Songs (z.B. weil es 18+ ist) / The song is on the list of blocked songs (e.g. because it is 18+)"
 
     return True, None
 
 
-def validate_song(url, artist, title, start_ts, end_ts, blocked_songs):
-    """Validate a single song and return errors if any."""
+def passes_local_checks(artist_norm, title_norm, start_ts, end_ts, blocked_songs):
+    """Check whether a song passes all checks that need no YouTube data."""
+    return check_duration(start_ts, end_ts)[0] and check_blocked_song(artist_norm, title_norm, blocked_songs)[0]
+
+
+def validate_song(url, artist, title, start_ts, end_ts, blocked_songs, video_infos=None,
+                  artist_norm=None, title_norm=None, fail_fast=False):
+    """Validate a single song and return errors if any.
+
+    If video_infos (cleaned URL -> video info) is given, video information is
+    looked up there instead of being fetched. artist_norm/title_norm are the
+    precomputed normalize_text() values of artist/title. With fail_fast, a song
+    failing the duration or blocklist check is rejected without fetching video
+    information, so only those errors are reported.
+    """
     errors = []
 
+    if artist_norm is None:
+        artist_norm = normalize_text(artist)
+    if title_norm is None:
+        title_norm = normalize_text(title)
+
     # Clean URL
     clean_url = clean_youtube_url(url)
     if not clean_url:
         return ["Keine URL angegeben / No URL provided"], clean_url
+    if not is_youtube_url(clean_url):
+        return [f"Keine YouTube-URL ({clean_url}) / Not a YouTube URL ({clean_url})"], clean_url
+
+    # Checks that need no network access
+    duration_ok, duration_error = check_duration(start_ts, end_ts)
+    blocked_ok, blocked_error = check_blocked_song(artist_norm, title_norm, blocked_songs)
+    if fail_fast and not (duration_ok and blocked_ok):
+        return [error for error in (duration_error, blocked_error) if error], clean_url
 
     # Fetch video info
-    video_info = get_youtube_info(clean_url)
+    if video_infos is not None and clean_url in video_infos:
+        video_info = video_infos[clean_url]
+    else:
+        video_info = get_youtube_info(clean_url)
 
     if video_info and 'error' in video_info:
         errors.append(f"YouTube-Fehler: {video_info['error']} / YouTube error: {video_info['error']}")
         return errors, clean_url
 
+    # Lowercase the video texts once; the normalized title builds on the lowercase one
+    lowered_texts = lowercase_video_texts(video_info)
+    yt_title_norm = _normalize_lower(lowered_texts[0])
+
     # Check artist and title match
-    match_ok, match_error = check_artist_title_match(video_info, artist, title)
+    match_ok, match_error = check_artist_title_match(video_info, artist, title, artist_norm, title_norm,
+                                                     yt_title_norm)
     if not match_ok:
         errors.append(match_error)
 
     # Check if lyric video
-    lyric_ok, lyric_error = check_is_lyric_video(video_info)
+    lyric_ok, lyric_error = check_is_lyric_video(video_info, lowered_texts)
     if not lyric_ok:
         errors.append(lyric_error)
 
     # Check duration
-    duration_ok, duration_error = check_duration(start_ts, end_ts)
     if not duration_ok:
         errors.append(duration_error)
 
@@ -271,7 +489,6 @@ def validate_song(url, artist, title, start_ts, end_ts, blocked_songs):
         errors.append(age_error)
 
     # Check blocked songs
-    blocked_ok, blocked_error = check_blocked_song(artist, title, blocked_songs)
     if not blocked_ok:
         errors.append(blocked_error)
 
@@ -299,7 +516,7 @@ def create_contact_url(row):
         phone = row.get('WhatsApp Number', '')
         if pd.notna(phone) and phone:
             # Clean phone number (remove spaces, dashes, etc.)
-            phone = re.sub(r'[^\d+]', '', str(phone))
+            phone = _PHONE_CLEAN_RE.sub('', str(phone))
             # Ensure it starts with country code
             if not phone.startswith('+'):
                 phone = '+' + phone
@@ -414,34 +631,108 @@ def create_blocked_songs_template():
         print(f"Created blocked songs template: {BLOCKED_SONGS_FILE}")
 
 
+def iter_songlist_rows(results):
+    """Yield (row values, has errors) for the Songlist sheet.
+
+    results is the column-wise dict built by process_songwishes. All first songs
+    come first, then all second songs. Row numbers in the formulas start at 2,
+    below the header row.
+    """
+    row_num = 2
+    song_counter = 1
+
+    for suffix in ('1', '2'):
+        songs = zip(
+            results[f'url{suffix}'], results[f'artist{suffix}'], results[f'title{suffix}'],
+            results[f'part{suffix}'], results[f'start{suffix}'], results[f'end{suffix}'],
+            results[f'note{suffix}'], results[f'errors{suffix}'], results['instagram'], results['email'],
+        )
+        for url, artist, title, part, start, end, note, errors, instagram, email in songs:
+            if not url or pd.isna(url):
+                continue
+
+            start_seconds = parse_timestamp(start)
+            end_seconds = parse_timestamp(end)
+
+            # Description (Teil des Liedes) - clean up "Other" placeholder
+            part_value = part if pd.notna(part) else ""
+            if 'Other (Please use "Additional Information" Text Field)' in str(part_value):
+                part_value = str(part_value).replace('Other (Please use "Additional Information" Text Field)', '').strip()
+            if not part_value:
+                part_value = "Chorus"
+            # Use Instagram name if available, otherwise email
+            requester = instagram if pd.notna(instagram) and instagram else email
+            if requester and str(requester).startswith('@'):
+                requester = str(requester)[1:]
+
+            if suffix == '1':
+                # Category: Top 50 for first guaranteed songs, Pool for rest
+                category = "Top 50" if song_counter <= FIRST_GUARANTEED_COUNT else "Pool"
+            else:
+                # Second wishes are always Pool
+                requester = f"Pool: {requester}"
+                category = "Pool"
+
+            yield [
+                url,
+                artist,
+                title,
+                part_value,
+                requester,  # Requester
+                start_seconds // 60,  # Start minute
+                start_seconds % 60,  # Start second
+                end_seconds // 60,  # End minute
+                end_seconds % 60,  # End second
+                f'=F{row_num}*60+G{row_num}',
+                f'=H{row_num}*60+I{row_num}',
+                song_counter,
+                note if pd.notna(note) else "",
+                "; ".join(errors) if errors else "",
+                category,
+                # Duration formula: End - Start + 10
+                f'=K{row_num}-J{row_num}+10',
+                # Artist CAPS formula
+                f'=UPPER(B{row_num})',
+                # Title CAPS formula
+                f'=UPPER(C{row_num})',
+                # Timestamp formula: m:ss - m:ss
+                f'=INT(J{row_num}/60)&":"&TEXT(MOD(J{row_num},60),"00")&" - "&INT(K{row_num}/60)&":"&TEXT(MOD(K{row_num},60),"00")',
+            ], bool(errors)
+
+            row_num += 1
+            song_counter += 1
+
+
 def generate_messages_html(results, output_html_file):
     """Generate an HTML file with clickable send buttons for WhatsApp and Instagram."""
     import html as html_module
 
+    request_count = len(results['message'])
+    guaranteed = zip(
+        results['errors1'], results['artist1'], results['title1'], results['instagram'], results['email'],
+        results['contact_type'], results['contact_url'], results['message'],
+    )
+
     rows_html = []
-    for i, result in enumerate(results[:FIRST_GUARANTEED_COUNT]):
-        has_errors = bool(result['errors1'])
+    for i, (errors, artist, title, instagram, email, contact_type, contact_url, message) in enumerate(
+            islice(guaranteed, FIRST_GUARANTEED_COUNT)):
+        has_errors = bool(errors)
         status_class = 'error' if has_errors else 'ok'
         status_text = 'Fehler' if has_errors else 'OK'
-        artist = html_module.escape(str(result['artist1']) if pd.notna(result['artist1']) else '')
-        title = html_module.escape(str(result['title1']) if pd.notna(result['title1']) else '')
+        artist = html_module.escape(str(artist) if pd.notna(artist) else '')
+        title = html_module.escape(str(title) if pd.notna(title) else '')
         song = f"{artist} - {title}"
 
         # Requester display
-        instagram = result.get('instagram', '')
         requester = ''
         if pd.notna(instagram) and instagram:
             requester = str(instagram).strip()
             if requester.startswith('@'):
                 requester = requester[1:]
         if not requester:
-            email = result.get('email', '')
             requester = str(email) if pd.notna(email) and email else ''
         requester = html_module.escape(requester)
 
-        contact_type = result.get('contact_type', 'other')
-        contact_url = result.get('contact_url', '')
-        message = result['message']
         # Escape message for embedding in JS data attribute
         message_escaped = html_module.escape(message)
 
@@ -503,7 +794,7 @@ def generate_messages_html(results, output_html_file):
 </head>
 <body>
 <h1>RDG Stuttgart - Songwish Messages</h1>
-<p>{min(len(results), FIRST_GUARANTEED_COUNT)} Nachrichten (erste {FIRST_GUARANTEED_COUNT} garantierte Requests)</p>
+<p>{min(request_count, FIRST_GUARANTEED_COUNT)} Nachrichten (erste {FIRST_GUARANTEED_COUNT} garantierte Requests)</p>
 <table>
 <thead>
   <tr><th>#</th><th>Status</th><th>Requester</th><th>Song</th><th>Aktion</th></tr>
@@ -551,9 +842,21 @@ function copyAndOpen(btn) {{
     print(f"HTML messages saved to: {output_html_file}")
 
 
-def process_songwishes(input_file, output_file, form_url=FORM_URL):
+# Fields stored per song wish in the column-wise results of process_songwishes
+RESULT_FIELDS = [
+    'email', 'instagram',
+    'url1', 'artist1', 'title1', 'part1', 'start1', 'end1', 'note1', 'errors1',
+    'url2', 'artist2', 'title2', 'part2', 'start2', 'end2', 'note2', 'errors2',
+    'contact_url', 'contact_type', 'message', 'ok_message',
+]
+
+
+def process_songwishes(input_file, output_file, form_url=FORM_URL, fail_fast=FAIL_FAST_VALIDATION):
     """Main processing function."""
     print(f"Reading {input_file}...")
+    # pandas already streams the sheet through openpyxl in read-only mode. It also
+    # renames the repeated second-song headers to 'YT URL.1' etc., which the
+    # column lookups below rely on.
     df = pd.read_excel(input_file)
 
     # Skip first row if it contains translations (no longer needed with new format)
@@ -566,11 +869,37 @@ def process_songwishes(input_file, output_file, form_url=FORM_URL):
     blocked_songs = load_blocked_songs()
     print(f"Loaded {len(blocked_songs)} blocked songs")
 
-    # Process each song wish
-    results = []
-
-    for idx, row in df.iterrows():
-        print(f"Processing request {idx + 1}/{len(df)}...")
+    # Normalize artists and titles for all rows at once
+    df['_artist1_norm'] = normalize_series(_column(df, 'Künstler\nArtist'))
+    df['_title1_norm'] = normalize_series(_column(df, 'Songname\nSong Title'))
+    df['_artist2_norm'] = normalize_series(_column(df, 'Künstler\nArtist.1'))
+    df['_title2_norm'] = normalize_series(_column(df, 'Songname\nSong Title.1'))
+
+    # Fetch YouTube info for all songs up front (network bound, runs in parallel).
+    # Non-YouTube URLs and, with fail_fast, songs failing a local check are not fetched.
+    all_urls = []
+    for column_suffix, song in (('', '1'), ('.1', '2')):
+        songs = zip(_column(df, 'YT URL' + column_suffix), df[f'_artist{song}_norm'], df[f'_title{song}_norm'],
+                    _column(df, 'Start Timestamp' + column_suffix), _column(df, 'End Timestamp' + column_suffix))
+        for url, artist_norm, title_norm, start_ts, end_ts in songs:
+            clean_url = clean_youtube_url(url)
+            if not is_youtube_url(clean_url):
+                continue
+            if fail_fast and not passes_local_checks(artist_norm, title_norm, start_ts, end_ts, blocked_songs):
+                continue
+            all_urls.append(clean_url)
+    print(f"Fetching YouTube info for {len(set(all_urls))} videos ({len(all_urls)} songs)...")
+    video_infos = fetch_youtube_infos(all_urls)
+
+    # Process each song wish. Rows are plain dicts keyed by column name, which
+    # is much cheaper than building a pd.Series per row and keeps row.get() working.
+    # Results are stored column-wise (one list per field), so each output pass
+    # only touches the fields it needs.
+    results = {key: [] for key in RESULT_FIELDS}
+    records = df.to_dict('records')
+
+    for idx, row in enumerate(records):
+        print(f"Processing request {idx + 1}/{len(records)}...")
 
         # First song
         url1 = row.get('YT URL', '')
@@ -581,7 +910,8 @@ def process_songwishes(input_file, output_file, form_url=FORM_URL):
         end1 = row.get('End Timestamp', '')
         note1 = row.get('Anmerkung\nAdditional Information', '')
 
-        errors1, clean_url1 = validate_song(url1, artist1, title1, start1, end1, blocked_songs)
+        errors1, clean_url1 = validate_song(url1, artist1, title1, start1, end1, blocked_songs, video_infos,
+                                            row['_artist1_norm'], row['_title1_norm'], fail_fast)
 
         # Second song
         url2 = row.get('YT URL.1', '')
@@ -592,81 +922,77 @@ def process_songwishes(input_file, output_file, form_url=FORM_URL):
         end2 = row.get('End Timestamp.1', '')
         note2 = row.get('Anmerkung\nAdditional Information.1', '')
 
-        errors2, clean_url2 = validate_song(url2, artist2, title2, start2, end2, blocked_songs) if pd.notna(url2) and url2 else ([], None)
+        errors2, clean_url2 = validate_song(url2, artist2, title2, start2, end2, blocked_songs, video_infos,
+                                            row['_artist2_norm'], row['_title2_norm'], fail_fast) if pd.notna(url2) and url2 else ([], None)
 
         contact_url, contact_type = create_contact_url(row)
 
-        results.append({
-            'row_index': idx,
-            'email': row.get('Email Address', ''),
-            'language': row.get('Sprache der Regeln\nLanguage of the Rules', ''),
-            'contact_pref': row.get('Bevorzugte Kommunikation\nPreferred communication', ''),
-            'instagram': row.get('Instagram @Name', ''),
-            'whatsapp': row.get('WhatsApp Number', ''),
-            'other_contact': row.get('Weitere Kontaktmöglichkeit\nFurther contact information', ''),
-            # Song 1
-            'url1': clean_url1,
-            'artist1': artist1,
-            'title1': title1,
-            'part1': part1,
-            'start1': start1,
-            'end1': end1,
-            'note1': note1,
-            'errors1': errors1,
-            # Song 2
-            'url2': clean_url2,
-            'artist2': artist2,
-            'title2': title2,
-            'part2': part2,
-            'start2': start2,
-            'end2': end2,
-            'note2': note2,
-            'errors2': errors2,
-            # Contact
-            'contact_url': contact_url,
-            'contact_type': contact_type,
-            'message': create_message(row, errors1, row.get('Sprache der Regeln\nLanguage of the Rules', ''), form_url, artist1, title1),
-            'ok_message': create_message(row, [], row.get('Sprache der Regeln\nLanguage of the Rules', ''), form_url, artist1, title1),
-        })
+        language = row.get('Sprache der Regeln\nLanguage of the Rules', '')
+
+        # Requester
+        results['email'].append(row.get('Email Address', ''))
+        results['instagram'].append(row.get('Instagram @Name', ''))
+        # Song 1
+        results['url1'].append(clean_url1)
+        results['artist1'].append(artist1)
+        results['title1'].append(title1)
+        results['part1'].append(part1)
+        results['start1'].append(start1)
+        results['end1'].append(end1)
+        results['note1'].append(note1)
+        results['errors1'].append(errors1)
+        # Song 2
+        results['url2'].append(clean_url2)
+        results['artist2'].append(artist2)
+        results['title2'].append(title2)
+        results['part2'].append(part2)
+        results['start2'].append(start2)
+        results['end2'].append(end2)
+        results['note2'].append(note2)
+        results['errors2'].append(errors2)
+        # Contact
+        results['contact_url'].append(contact_url)
+        results['contact_type'].append(contact_type)
+        results['message'].append(create_message(row, errors1, language, form_url, artist1, title1))
+        results['ok_message'].append(create_message(row, [], language, form_url, artist1, title1))
+    request_count = len(records)
 
     # Create output Excel
     print(f"Creating output file: {output_file}...")
 
-    wb = Workbook()
+    # Write-only mode streams rows to disk instead of keeping every cell in memory.
+    # Column widths have to be set before the first row is appended.
+    wb = Workbook(write_only=True)
+
+    # Named styles are registered with the workbook once; assigning one to a cell
+    # is a name lookup instead of a fill/font lookup per assignment. Each style
+    # needs an explicit font, otherwise NamedStyle writes an empty font record
+    # instead of the workbook default (Calibri 11).
+    header_font = copy(DEFAULT_FONT)
+    header_font.b = True
+    wb.add_named_style(NamedStyle(
+        name='header', font=header_font,
+        fill=PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid"),
+    ))
+    wb.add_named_style(NamedStyle(
+        name='error', font=copy(DEFAULT_FONT),
+        fill=PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid"),
+    ))
+    wb.add_named_style(NamedStyle(
+        name='success', font=copy(DEFAULT_FONT),
+        fill=PatternFill(start_color="CCFFCC", end_color="CCFFCC", fill_type="solid"),
+    ))
+
+    def styled_row(ws, values, style):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            cells.append(cell)
+        return cells
 
     # Sheet 1: Messages (first 50 requests, first song only)
-    ws_messages = wb.active
-    ws_messages.title = "Messages"
-
-    # Headers
-    headers = ['#', 'Contact URL', 'Message', 'Status', 'Artist', 'Title', 'Errors', 'OK Message']
-    for col, header in enumerate(headers, 1):
-        cell = ws_messages.cell(row=1, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-
-    # Data (first 50)
-    error_fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
-    success_fill = PatternFill(start_color="CCFFCC", end_color="CCFFCC", fill_type="solid")
-
-    for i, result in enumerate(results[:FIRST_GUARANTEED_COUNT]):
-        row_num = i + 2
-        ws_messages.cell(row=row_num, column=1, value=i + 1)
-        ws_messages.cell(row=row_num, column=2, value=result['contact_url'])
-        ws_messages.cell(row=row_num, column=3, value=result['message'])
-
-        has_errors = bool(result['errors1'])
-        status = "Fehler / Error" if has_errors else "OK"
-        ws_messages.cell(row=row_num, column=4, value=status)
-        ws_messages.cell(row=row_num, column=5, value=result['artist1'])
-        ws_messages.cell(row=row_num, column=6, value=result['title1'])
-        ws_messages.cell(row=row_num, column=7, value="; ".join(result['errors1']) if result['errors1'] else "")
-        ws_messages.cell(row=row_num, column=8, value=result['ok_message'])
-
-        # Color coding
-        fill = error_fill if has_errors else success_fill
-        for col in range(1, 9):
-            ws_messages.cell(row=row_num, column=col).fill = fill
+    ws_messages = wb.create_sheet("Messages")
 
     # Adjust column widths
     ws_messages.column_dimensions['A'].width = 5
@@ -678,128 +1004,35 @@ def process_songwishes(input_file, output_file, form_url=FORM_URL):
     ws_messages.column_dimensions['G'].width = 50
     ws_messages.column_dimensions['H'].width = 80
 
-    # Sheet 2: Songlist
-    ws_songlist = wb.create_sheet("Songlist")
-
-    # Headers matching request.xlsx format + additional columns
-    songlist_headers = [
-        'YouTube-URL', 'Artist', 'Title', 'Description', 'Requester/Dancer',
-        'Start: Minute', 'Start: Second', 'End: Minute', 'End: Seconds',
-        'Start in Seconds', 'End in Seconds',
-        '#', 'Anmerkung', 'Errors',
-        'Category', 'Duration', 'Artist CAPS', 'Title CAPS', 'Timestamp'
-    ]
+    # Headers
+    headers = ['#', 'Contact URL', 'Message', 'Status', 'Artist', 'Title', 'Errors', 'OK Message']
+    ws_messages.append(styled_row(ws_messages, headers, 'header'))
 
-    for col, header in enumerate(songlist_headers, 1):
-        cell = ws_songlist.cell(row=1, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+    # Data (first 50)
+    guaranteed = zip(
+        results['contact_url'], results['message'], results['artist1'], results['title1'],
+        results['errors1'], results['ok_message'],
+    )
+    for i, (contact_url, message, artist, title, errors, ok_message) in enumerate(
+            islice(guaranteed, FIRST_GUARANTEED_COUNT)):
+        has_errors = bool(errors)
+        status = "Fehler / Error" if has_errors else "OK"
 
-    # Add first songs first, then second songs
-    row_num = 2
-    song_counter = 1
+        # Color coding
+        style = 'error' if has_errors else 'success'
+        ws_messages.append(styled_row(ws_messages, [
+            i + 1,
+            contact_url,
+            message,
+            status,
+            artist,
+            title,
+            "; ".join(errors) if errors else "",
+            ok_message,
+        ], style))
 
-    # First songs (all)
-    for result in results:
-        if not result['url1']:
-            continue
-
-        start_seconds = parse_timestamp(result['start1'])
-        end_seconds = parse_timestamp(result['end1'])
-
-        ws_songlist.cell(row=row_num, column=1, value=result['url1'])
-        ws_songlist.cell(row=row_num, column=2, value=result['artist1'])
-        ws_songlist.cell(row=row_num, column=3, value=result['title1'])
-        # Description (Teil des Liedes) - clean up "Other" placeholder
-        part1_value = result['part1'] if pd.notna(result['part1']) else ""
-        if 'Other (Please use "Additional Information" Text Field)' in str(part1_value):
-            part1_value = str(part1_value).replace('Other (Please use "Additional Information" Text Field)', '').strip()
-        if not part1_value:
-            part1_value = "Chorus"
-        ws_songlist.cell(row=row_num, column=4, value=part1_value)
-        # Use Instagram name if available, otherwise email
-        requester = result['instagram'] if pd.notna(result['instagram']) and result['instagram'] else result['email']
-        if requester and str(requester).startswith('@'):
-            requester = str(requester)[1:]
-        ws_songlist.cell(row=row_num, column=5, value=requester)  # Requester
-        ws_songlist.cell(row=row_num, column=6, value=start_seconds // 60)  # Start minute
-        ws_songlist.cell(row=row_num, column=7, value=start_seconds % 60)  # Start second
-        ws_songlist.cell(row=row_num, column=8, value=end_seconds // 60)  # End minute
-        ws_songlist.cell(row=row_num, column=9, value=end_seconds % 60)  # End second
-        ws_songlist.cell(row=row_num, column=10).value = f'=F{row_num}*60+G{row_num}'
-        ws_songlist.cell(row=row_num, column=11).value = f'=H{row_num}*60+I{row_num}'
-        ws_songlist.cell(row=row_num, column=12, value=song_counter)
-        ws_songlist.cell(row=row_num, column=13, value=result['note1'] if pd.notna(result['note1']) else "")
-        ws_songlist.cell(row=row_num, column=14, value="; ".join(result['errors1']) if result['errors1'] else "")
-        # Category: Top 50 for first guaranteed songs, Pool for rest
-        ws_songlist.cell(row=row_num, column=15, value="Top 50" if song_counter <= FIRST_GUARANTEED_COUNT else "Pool")
-        # Duration formula: End - Start + 10
-        ws_songlist.cell(row=row_num, column=16).value = f'=K{row_num}-J{row_num}+10'
-        # Artist CAPS formula
-        ws_songlist.cell(row=row_num, column=17).value = f'=UPPER(B{row_num})'
-        # Title CAPS formula
-        ws_songlist.cell(row=row_num, column=18).value = f'=UPPER(C{row_num})'
-        # Timestamp formula: m:ss - m:ss
-        ws_songlist.cell(row=row_num, column=19).value = f'=INT(J{row_num}/60)&":"&TEXT(MOD(J{row_num},60),"00")&" - "&INT(K{row_num}/60)&":"&TEXT(MOD(K{row_num},60),"00")'
-
-        # Mark errors with red background
-        if result['errors1']:
-            for col in range(1, 20):
-                ws_songlist.cell(row=row_num, column=col).fill = error_fill
-
-        row_num += 1
-        song_counter += 1
-
-    # Second songs
-    for result in results:
-        if not result['url2'] or pd.isna(result['url2']):
-            continue
-
-        start_seconds = parse_timestamp(result['start2'])
-        end_seconds = parse_timestamp(result['end2'])
-
-        ws_songlist.cell(row=row_num, column=1, value=result['url2'])
-        ws_songlist.cell(row=row_num, column=2, value=result['artist2'])
-        ws_songlist.cell(row=row_num, column=3, value=result['title2'])
-        # Description (Teil des Liedes) - clean up "Other" placeholder
-        part2_value = result['part2'] if pd.notna(result['part2']) else ""
-        if 'Other (Please use "Additional Information" Text Field)' in str(part2_value):
-            part2_value = str(part2_value).replace('Other (Please use "Additional Information" Text Field)', '').strip()
-        if not part2_value:
-            part2_value = "Chorus"
-        ws_songlist.cell(row=row_num, column=4, value=part2_value)
-        # Use Instagram name if available, otherwise email
-        requester = result['instagram'] if pd.notna(result['instagram']) and result['instagram'] else result['email']
-        if requester and str(requester).startswith('@'):
-            requester = str(requester)[1:]
-        ws_songlist.cell(row=row_num, column=5, value=f"Pool: {requester}")  # Requester (second wish)
-        ws_songlist.cell(row=row_num, column=6, value=start_seconds // 60)  # Start minute
-        ws_songlist.cell(row=row_num, column=7, value=start_seconds % 60)  # Start second
-        ws_songlist.cell(row=row_num, column=8, value=end_seconds // 60)  # End minute
-        ws_songlist.cell(row=row_num, column=9, value=end_seconds % 60)  # End second
-        ws_songlist.cell(row=row_num, column=10).value = f'=F{row_num}*60+G{row_num}'
-        ws_songlist.cell(row=row_num, column=11).value = f'=H{row_num}*60+I{row_num}'
-        ws_songlist.cell(row=row_num, column=12, value=song_counter)
-        ws_songlist.cell(row=row_num, column=13, value=result['note2'] if pd.notna(result['note2']) else "")
-        ws_songlist.cell(row=row_num, column=14, value="; ".join(result['errors2']) if result['errors2'] else "")
-        # Category: Second wishes are always Pool
-        ws_songlist.cell(row=row_num, column=15, value="Pool")
-        # Duration formula: End - Start + 10
-        ws_songlist.cell(row=row_num, column=16).value = f'=K{row_num}-J{row_num}+10'
-        # Artist CAPS formula
-        ws_songlist.cell(row=row_num, column=17).value = f'=UPPER(B{row_num})'
-        # Title CAPS formula
-        ws_songlist.cell(row=row_num, column=18).value = f'=UPPER(C{row_num})'
-        # Timestamp formula: m:ss - m:ss
-        ws_songlist.cell(row=row_num, column=19).value = f'=INT(J{row_num}/60)&":"&TEXT(MOD(J{row_num},60),"00")&" - "&INT(K{row_num}/60)&":"&TEXT(MOD(K{row_num},60),"00")'
-
-        # Mark errors with red background
-        if result['errors2']:
-            for col in range(1, 20):
-                ws_songlist.cell(row=row_num, column=col).fill = error_fill
-
-        row_num += 1
-        song_counter += 1
+    # Sheet 2: Songlist
+    ws_songlist = wb.create_sheet("Songlist")
 
     # Adjust column widths for Songlist
     ws_songlist.column_dimensions['A'].width = 50
@@ -816,6 +1049,22 @@ def process_songwishes(input_file, output_file, form_url=FORM_URL):
     ws_songlist.column_dimensions['R'].width = 30
     ws_songlist.column_dimensions['S'].width = 20
 
+    # Headers matching request.xlsx format + additional columns
+    songlist_headers = [
+        'YouTube-URL', 'Artist', 'Title', 'Description', 'Requester/Dancer',
+        'Start: Minute', 'Start: Second', 'End: Minute', 'End: Seconds',
+        'Start in Seconds', 'End in Seconds',
+        '#', 'Anmerkung', 'Errors',
+        'Category', 'Duration', 'Artist CAPS', 'Title CAPS', 'Timestamp'
+    ]
+    ws_songlist.append(styled_row(ws_songlist, songlist_headers, 'header'))
+
+    # First songs first, then second songs; error rows get a red background
+    for row_values, has_errors in iter_songlist_rows(results):
+        if has_errors:
+            row_values = styled_row(ws_songlist, row_values, 'error')
+        ws_songlist.append(row_values)
+
     # Save
     wb.save(output_file)
     print(f"Output saved to: {output_file}")
@@ -825,13 +1074,13 @@ def process_songwishes(input_file, output_file, form_url=FORM_URL):
     generate_messages_html(results, html_file)
 
     # Print summary
-    total_errors_song1 = sum(1 for r in results if r['errors1'])
-    total_errors_song2 = sum(1 for r in results if r['errors2'] and r['url2'])
+    total_errors_song1 = sum(1 for errors in results['errors1'] if errors)
+    total_errors_song2 = sum(1 for errors, url in zip(results['errors2'], results['url2']) if errors and url)
     print(f"\n=== Summary ===")
-    print(f"Total requests: {len(results)}")
+    print(f"Total requests: {request_count}")
     print(f"First songs with errors: {total_errors_song1}")
     print(f"Second songs with errors: {total_errors_song2}")
-    print(f"First 50 guaranteed: {min(len(results), FIRST_GUARANTEED_COUNT)}")
+    print(f"First 50 guaranteed: {min(request_count, FIRST_GUARANTEED_COUNT)}")
 
 
 if __name__ == "__main__":